@@ -0,0 +1,85 @@
+from PIL import Image
+from image_palette import ImagePalette
+from palette_cache import PaletteCache, DEFAULT_HASH_THRESHOLD, DEFAULT_COLOR_THRESHOLD
+from palette_store import PaletteStoreWriter
+
+def load_palette(path, num_colors, palette_cache=None):
+    """
+    Load an image file and extract its palette without any user interaction.
+
+    :param path: Path to the image file.
+    :param num_colors: Number of dominant colors to extract.
+    :param palette_cache: Optional PaletteCache used to reuse near-duplicate palettes.
+
+    :return: ImagePalette object.
+    """
+    with Image.open(path) as image:
+        return ImagePalette(image, num_colors, interactive=False, palette_cache=palette_cache)
+
+def extract_palettes(paths, num_colors, threshold=DEFAULT_HASH_THRESHOLD, color_threshold=DEFAULT_COLOR_THRESHOLD):
+    """
+    Extract palettes for a batch of image files.
+
+    Each image is fingerprinted after downscaling. An image within `threshold`
+    hash bits of one already processed, and whose color signature is within
+    `color_threshold` of it, reuses that image's palette instead of being clustered again.
+
+    :param paths: Iterable of image file paths.
+    :param num_colors: Number of dominant colors to extract per image.
+    :param threshold: Maximum Hamming distance for near-duplicate reuse, or None to disable.
+    :param color_threshold: Maximum mean per-channel color signature difference (0-255) for near-duplicate reuse.
+
+    :return: Dictionary mapping each successfully processed path to its ImagePalette.
+    """
+    palette_cache = PaletteCache(threshold, color_threshold) if threshold is not None else None
+    palettes = {}
+    for path in paths:
+        try:
+            palettes[path] = load_palette(path, num_colors, palette_cache)
+        except Exception as e:
+            print(f"\033[91mError processing {path}: {e}\033[0m")
+
+    if palette_cache is not None:
+        print(f"Reused {palette_cache.hits} palettes from near-duplicate images ({palette_cache.misses} clustered).")
+    return palettes
+
+def write_palettes(paths, num_colors, directory, threshold=DEFAULT_HASH_THRESHOLD,
+                   color_threshold=DEFAULT_COLOR_THRESHOLD, shard_size=10000):
+    """
+    Extract palettes for a batch of image files and stream them into a palette store.
+
+    Unlike extract_palettes, results are not kept in memory, so this suits very large batches.
+
+    :param paths: Iterable of image file paths.
+    :param num_colors: Number of dominant colors to extract per image.
+    :param directory: Palette store directory to append to.
+    :param threshold: Maximum Hamming distance for near-duplicate reuse, or None to disable.
+    :param color_threshold: Maximum mean per-channel color signature difference (0-255) for near-duplicate reuse.
+    :param shard_size: Number of records per shard.
+
+    :return: Number of palettes written.
+    """
+    palette_cache = PaletteCache(threshold, color_threshold) if threshold is not None else None
+    written = 0
+    with PaletteStoreWriter(directory, num_colors, shard_size=shard_size) as writer:
+        for path in paths:
+            try:
+                palette = load_palette(path, num_colors, palette_cache)
+            except Exception as e:
+                print(f"\033[91mError processing {path}: {e}\033[0m")
+                continue
+            writer.append(path, palette)
+            written += 1
+    return written
+
+def extract_file_colors(path, num_colors):
+    """
+    Extract a palette in a pool worker and return it in a picklable form.
+
+    :param path: Path to the image file.
+    :param num_colors: Number of dominant colors to extract.
+
+    :return: List of [r, g, b] integer lists sorted by hue.
+    """
+    palette = load_palette(path, num_colors)
+    return [[int(channel) for channel in color] for color in palette.get_rgb_list()]
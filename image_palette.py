@@ -1,6 +1,9 @@
 import numpy as np
 from sklearn.cluster import KMeans
 
+# Maximum image size used for processing (images are downscaled to fit)
+THUMBNAIL_SIZE = (200, 200)
+
 class ImagePalette:
     """
     A class to represent an image and its extracted color palette.
@@ -9,23 +12,31 @@ class ImagePalette:
     and providing methods to manipulate and export the color palette.
     """
 
-    def __init__(self, image, num_colors):
+    def __init__(self, image, num_colors, interactive=True, palette_cache=None):
         """
         Initialize the ImagePalette with a PIL Image and number of colors.
 
         :param image: PIL Image object.
         :param num_colors: Number of dominant colors to extract.
+        :param interactive: Whether to print image info, show a preview and wait for Enter
+                            (set to False for batch processing).
+        :param palette_cache: Optional PaletteCache used to reuse the palette of a near-identical image.
         """
         # Store number of colors
         self.num_colors = num_colors
+        # Store processing mode and optional near-duplicate cache
+        self.interactive = interactive
+        self.palette_cache = palette_cache
         # Store the image
         self.image = image
-        # Process image (resize, convert to RGB, display)
+        # Process image (resize, convert to RGB, fingerprint, display)
         self.image = self._process_image()
         # Extract pixel data as numpy array
         self.pixels = self._extract_pixels()
-        # Extract the color palette using KMeans clustering
-        self.colors = self._extract_colors(self.pixels, self.num_colors)
+        # Extract the color palette using KMeans clustering (or reuse a cached near-duplicate palette)
+        self.colors = self._extract_cached_colors()
+        # Share of pixels in each color's cluster, kept in the same order as the colors
+        self.weights = self._compute_weights(self.pixels, self.colors)
         # Set default sort method (hue)
         self.current_sort = "hue"
         # Apply initial sort
@@ -34,33 +45,46 @@ class ImagePalette:
         self.is_filtered = False
         self.is_complementary = False
         self.original_unfiltered_colors = None # For filter restoration
+        self.original_unfiltered_weights = None
+        self.brightness_range = (0.0, 1.0) # Effective (min, max) brightness kept by the active filter
         self.show_hsv = False
 
     def _process_image(self):
         """
-        Process the loaded image: resize, convert to RGB, and display
+        Process the loaded image: resize, convert to RGB, fingerprint, and display
         
         :return: Processed PIL Image object in RGB mode
         """
-        from image_utils import display_image_in_terminal
+        from image_utils import display_image_in_terminal, compute_image_hash, compute_color_signature
 
         # Display image info
-        print(f"\nFile type: {self.image.format}")
-        print(f"Image size: {self.image.size}")
-        print(f"Image mode: {self.image.mode}")
+        if self.interactive:
+            print(f"\nFile type: {self.image.format}")
+            print(f"Image size: {self.image.size}")
+            print(f"Image mode: {self.image.mode}")
 
         # Resize image to speed up processing
-        self.image.thumbnail((200, 200))
-        print(f"Resized image size: {self.image.size}\n")
+        self.image.thumbnail(THUMBNAIL_SIZE)
+        if self.interactive:
+            print(f"Resized image size: {self.image.size}\n")
 
         # Convert to RGB if necessary
         if self.image.mode != "RGB":
-            print(f"Converting image from {self.image.mode} to RGB mode for processing...\n")
+            if self.interactive:
+                print(f"Converting image from {self.image.mode} to RGB mode for processing...\n")
             try:
                 self.image = self.image.convert("RGB")
-                print("Conversion successful.\n")
+                if self.interactive:
+                    print("Conversion successful.\n")
             except Exception as e:
                 raise Exception(f"Conversion failed: {e}. Please use a different image.")
+
+        # Fingerprint the downscaled image for near-duplicate detection
+        self.image_hash = compute_image_hash(self.image)
+        self.color_signature = compute_color_signature(self.image)
+
+        if not self.interactive:
+            return self.image
             
         # Display image in terminal if possible
         display_image_in_terminal(self.image)
@@ -82,7 +106,8 @@ class ImagePalette:
         pixels = np.array(pixel_list)
         return pixels
     
-    def _extract_colors(self, pixels, num_colors):
+    @staticmethod
+    def _extract_colors(pixels, num_colors):
         """
         Extract dominant colors from pixel data using KMeans clustering.
         
@@ -97,6 +122,38 @@ class ImagePalette:
         colors = kmeans.cluster_centers_.astype(int)
         return colors
     
+    @staticmethod
+    def _compute_weights(pixels, colors):
+        """
+        Compute the share of pixels closest to each color.
+
+        :param pixels: Numpy array of the RGB pixel values the colors were clustered from.
+        :param colors: RGB color values (cluster centers).
+
+        :return: Numpy array of weights (summing to 1) in the same order as the colors.
+        """
+        colors = np.array(colors, dtype=float)
+        # Assign every pixel to its nearest color
+        distances = ((pixels[:, None, :] - colors[None, :, :]) ** 2).sum(axis=2)
+        counts = np.bincount(distances.argmin(axis=1), minlength=len(colors))
+        return counts / counts.sum()
+
+    def _extract_cached_colors(self):
+        """
+        Extract dominant colors, reusing the stored palette of a near-identical
+        image from the palette cache when one is available.
+
+        :return: Numpy array of RGB color values.
+        """
+        if self.palette_cache is None:
+            return self._extract_colors(self.pixels, self.num_colors)
+
+        colors = self.palette_cache.lookup(self.image_hash, self.color_signature, self.num_colors)
+        if colors is None:
+            colors = self._extract_colors(self.pixels, self.num_colors)
+            self.palette_cache.store(self.image_hash, self.color_signature, self.num_colors, colors)
+        return colors
+
     def sort_by(self, method):
         """
         Sort colors by the specific method
@@ -104,12 +161,19 @@ class ImagePalette:
         :param method: Sort method - "hue", "saturation", "brightness"
         """
         from color_utils import rgb_to_hue, rgb_to_saturation, rgb_to_brightness
+        key = None
         if method == "hue":
-            self.colors = sorted(self.colors, key=rgb_to_hue)
+            key = rgb_to_hue
         elif method == "saturation":
-            self.colors = sorted(self.colors, key=rgb_to_saturation)
+            key = rgb_to_saturation
         elif method == "brightness":
-            self.colors = sorted(self.colors, key=rgb_to_brightness)
+            key = rgb_to_brightness
+
+        if key is not None:
+            # Sort indices so the weights stay aligned with their colors
+            order = sorted(range(len(self.colors)), key=lambda i: key(self.colors[i]))
+            self.colors = [self.colors[i] for i in order]
+            self.weights = self.weights[order]
 
         # Update current sort method
         self.current_sort = method
@@ -119,6 +183,7 @@ class ImagePalette:
         Reverse the order of the colors in the palette.
         """
         self.colors = self.colors[::-1]
+        self.weights = self.weights[::-1]
 
     def get_hex_list(self):
         """
@@ -152,6 +217,18 @@ class ImagePalette:
             rgba_list.append(f"rgba({r}, {g}, {b}, {opacity})")
         return rgba_list
     
+    def get_weights(self):
+        """
+        Get the share of clustered pixels belonging to each color in the palette.
+
+        Weights are computed when the colors are extracted (from the filtered
+        pixels while a filter is active) and carried through sorting and the
+        complementary mapping, so each weight describes its color's original cluster.
+
+        :return: Numpy array of weights (summing to 1) in the same order as the colors.
+        """
+        return np.array(self.weights)
+
     def extract_palette(self, num_colors):
         """
         Re-extract the color palette with a different number of colors.
@@ -160,6 +237,7 @@ class ImagePalette:
         """
         self.num_colors = num_colors
         self.colors = self._extract_colors(self.pixels, self.num_colors)
+        self.weights = self._compute_weights(self.pixels, self.colors)
         # Re-apply current sort
         self.sort_by(self.current_sort)
 
@@ -167,6 +245,8 @@ class ImagePalette:
         if self.is_filtered:
             self.is_filtered = False
             self.original_unfiltered_colors = None
+            self.original_unfiltered_weights = None
+            self.brightness_range = (0.0, 1.0)
         if self.is_complementary:
             self.is_complementary = False
 
@@ -189,6 +269,7 @@ class ImagePalette:
         if not self.is_filtered:
             # Store original pixels before filtering
             self.original_unfiltered_colors = self.colors.copy()
+            self.original_unfiltered_weights = self.weights.copy()
 
         # Filter pixels
         filtered_pixels = filter_extreme_pixels(
@@ -201,11 +282,16 @@ class ImagePalette:
 
         # Re-extract colors from filtered pixels
         self.colors = self._extract_colors(filtered_pixels, self.num_colors)
+        self.weights = self._compute_weights(filtered_pixels, self.colors)
         # Re-apply current sort
         self.sort_by(self.current_sort)
 
-        # Mark as filtered
+        # Mark as filtered and record the brightness range that was kept
         self.is_filtered = True
+        self.brightness_range = (
+            min_brightness if filter_dark else 0.0,
+            max_brightness if filter_light else 1.0,
+        )
 
     def remove_filter(self):
         """
@@ -213,9 +299,12 @@ class ImagePalette:
         """
         if self.is_filtered and self.original_unfiltered_colors is not None:
             self.colors = self.original_unfiltered_colors
+            self.weights = self.original_unfiltered_weights
             self.sort_by(self.current_sort)
             self.is_filtered = False
             self.original_unfiltered_colors = None
+            self.original_unfiltered_weights = None
+            self.brightness_range = (0.0, 1.0)
             # Also reset complementary state
             self.is_complementary = False
 
@@ -226,6 +315,7 @@ class ImagePalette:
         """
         from color_utils import rgb_to_complement
         # Convert each color to its complementary color and convert back to numpy array
+        # (weights are unchanged - each complement keeps the weight of the cluster it came from)
         self.colors = np.array([rgb_to_complement(color) for color in self.colors])
         # Re-apply current sort
         self.sort_by(self.current_sort)
@@ -28,8 +28,71 @@ def display_image_in_terminal(img):
     else:
         print("climage module not available. Install climage with: pip install climage")
 
+# Function to fingerprint an image for near-duplicate detection
+def compute_image_hash(img, hash_size=8):
+    """
+    Compute a perceptual difference hash (dHash) of an image.
+
+    The image is shrunk to a tiny greyscale grid and each bit records whether
+    a cell is brighter than its right-hand neighbour, so re-encoded, resized or
+    lightly cropped copies of an image produce hashes only a few bits apart.
+
+    :param img: PIL Image object (ideally already downscaled).
+    :param hash_size: Width/height of the hash grid (default 8 gives a 64-bit hash).
+
+    :return: Integer hash value.
+    """
+    small = img.convert("L").resize((hash_size + 1, hash_size))
+    grid = np.asarray(small, dtype=np.int16)
+    diff = grid[:, 1:] > grid[:, :-1]
+    image_hash = 0
+    for bit in diff.flatten():
+        image_hash = (image_hash << 1) | int(bit)
+    return image_hash
+
+# Function to summarise the colors of an image for near-duplicate detection
+def compute_color_signature(img, grid_size=8):
+    """
+    Compute a coarse color signature of an image.
+
+    The perceptual hash only sees greyscale gradients, so recolored or
+    channel-swapped copies of an image hash almost identically. The signature
+    keeps the mean color of each cell in a small grid so those can be told apart.
+
+    :param img: PIL Image object in RGB mode (ideally already downscaled).
+    :param grid_size: Width/height of the color grid (default 8).
+
+    :return: Numpy float array of shape (grid_size, grid_size, 3) with RGB values 0-255.
+    """
+    small = img.convert("RGB").resize((grid_size, grid_size))
+    return np.asarray(small, dtype=np.float32)
+
+# Function to measure how different two color signatures are
+def color_distance(signature_a, signature_b):
+    """
+    Compute the mean absolute per-channel difference between two color signatures.
+
+    :param signature_a: First color signature from compute_color_signature.
+    :param signature_b: Second color signature from compute_color_signature.
+
+    :return: Mean difference on the 0-255 scale.
+    """
+    return float(np.abs(signature_a - signature_b).mean())
+
+# Function to count differing bits between two image hashes
+def hamming_distance(hash_a, hash_b):
+    """
+    Count the number of bits that differ between two image hashes.
+
+    :param hash_a: First integer hash.
+    :param hash_b: Second integer hash.
+
+    :return: Number of differing bits.
+    """
+    return bin(hash_a ^ hash_b).count("1")
+
 # Function to filter out near-white and/or near-black colors
-def filter_extreme_pixels(pixels, filter_dark=True, filter_light=True, min_brightness=0.15, max_brightness=0.85):
+def filter_extreme_pixels(pixels, filter_dark=True, filter_light=True, min_brightness=0.15, max_brightness=0.85, brightness=None):
     """
     Filter out pixels that are too dark or too light based on brightness.
     
@@ -39,25 +102,35 @@ def filter_extreme_pixels(pixels, filter_dark=True, filter_light=True, min_brigh
         filter_light: whether to filter very light pixels  
         min_brightness: threshold for dark pixels (0-1), default 0.15
         max_brightness: threshold for light pixels (0-1), default 0.85
+        brightness: optional precomputed numpy array of per-pixel brightness (0-1)
     
     Returns:
         Filtered numpy array of pixels, or original if insufficient pixels remain
     """
     from color_utils import rgb_to_brightness
-    filtered_pixels = []
-    for pixel in pixels:
-        brightness = rgb_to_brightness(pixel)
-        
-        # Check if pixel should be excluded
-        too_dark = filter_dark and (brightness < min_brightness)
-        too_light = filter_light and (brightness > max_brightness)
+    if brightness is not None:
+        # Precomputed brightness - build the mask in one pass
+        keep = np.ones(len(pixels), dtype=bool)
+        if filter_dark:
+            keep &= brightness >= min_brightness
+        if filter_light:
+            keep &= brightness <= max_brightness
+        filtered_pixels = pixels[keep]
+    else:
+        filtered_pixels = []
+        for pixel in pixels:
+            pixel_brightness = rgb_to_brightness(pixel)
+
+            # Check if pixel should be excluded
+            too_dark = filter_dark and (pixel_brightness < min_brightness)
+            too_light = filter_light and (pixel_brightness > max_brightness)
 
-        if not (too_dark or too_light):
-            filtered_pixels.append(pixel)
+            if not (too_dark or too_light):
+                filtered_pixels.append(pixel)
 
     # If we filtered out too many pixels, return original
     if len(filtered_pixels) < 100: # Need at least some pixels to cluster
         print("\033[91mWarning: \033[0mToo many pixels filtered out. Using original pixel set for clustering.") # red
         return pixels
         
-    return np.array(filtered_pixels)
\ No newline at end of file
+    return np.asarray(filtered_pixels)
\ No newline at end of file
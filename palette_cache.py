@@ -0,0 +1,111 @@
+import numpy as np
+from image_utils import hamming_distance, color_distance
+
+# Default maximum number of differing hash bits for two images to count as near-duplicates
+DEFAULT_HASH_THRESHOLD = 5
+
+# Default maximum mean per-channel color difference (0-255) for two images to count as near-duplicates
+DEFAULT_COLOR_THRESHOLD = 12.0
+
+class PaletteCache:
+    """
+    A lookup of previously extracted palettes keyed by perceptual image hash and color signature.
+
+    Used in batch mode so that re-encoded, resized or lightly cropped copies of
+    an image reuse the stored palette instead of running KMeans again. A stored
+    palette is only reused when both the structure (hash) and the colors
+    (signature) of the images match, so recolored variants are clustered afresh.
+
+    Hashes are indexed by multi-index hashing: the hash is split into
+    threshold + 1 bands and each band is indexed in a dictionary. Two hashes
+    within `threshold` bits must agree exactly on at least one band, so a
+    lookup only compares against entries sharing a band instead of every entry.
+    """
+
+    def __init__(self, threshold=DEFAULT_HASH_THRESHOLD, color_threshold=DEFAULT_COLOR_THRESHOLD, hash_bits=64):
+        """
+        Initialize an empty PaletteCache.
+
+        :param threshold: Maximum Hamming distance between two image hashes
+                          for the images to be treated as near-duplicates (0 to hash_bits - 1).
+        :param color_threshold: Maximum mean per-channel difference (0-255) between
+                                two color signatures for the images to be treated as near-duplicates.
+        :param hash_bits: Number of bits in the image hashes (64 for the default compute_image_hash).
+        """
+        # Multi-index hashing needs more bands than the threshold, and at most one band per bit
+        if not 0 <= threshold < hash_bits:
+            raise ValueError(f"Hash threshold must be between 0 and {hash_bits - 1}, got {threshold}.")
+        self.threshold = threshold
+        self.color_threshold = color_threshold
+        # Split the hash into threshold + 1 bands of (nearly) equal width: [(shift, mask), ...]
+        num_bands = threshold + 1
+        bounds = [band * hash_bits // num_bands for band in range(num_bands + 1)]
+        self.bands = [(start, (1 << (end - start)) - 1) for start, end in zip(bounds, bounds[1:])]
+        # Stored palettes: [(image_hash, color_signature, colors), ...]
+        self.entries = []
+        # Band index: {(num_colors, band number, band value): [entry positions]}
+        self.index = {}
+        # Track cache effectiveness
+        self.hits = 0
+        self.misses = 0
+
+    def _band_keys(self, image_hash, num_colors):
+        """
+        Get the band index keys for a hash.
+
+        :param image_hash: Perceptual image hash.
+        :param num_colors: Number of colors in the palette.
+
+        :return: List of keys into the band index.
+        """
+        return [(num_colors, band, (image_hash >> shift) & mask) for band, (shift, mask) in enumerate(self.bands)]
+
+    def lookup(self, image_hash, color_signature, num_colors):
+        """
+        Find the stored palette of the closest near-identical image.
+
+        :param image_hash: Perceptual hash of the image being processed.
+        :param color_signature: Color signature of the image being processed.
+        :param num_colors: Number of colors the palette must contain.
+
+        :return: Numpy array of RGB color values, or None if no match is within both thresholds.
+        """
+        best_distance = None
+        best_colors = None
+        # Only entries sharing at least one band with the hash can be within the threshold
+        candidates = set()
+        for key in self._band_keys(image_hash, num_colors):
+            candidates.update(self.index.get(key, ()))
+
+        for position in sorted(candidates):
+            stored_hash, stored_signature, colors = self.entries[position]
+            distance = hamming_distance(image_hash, stored_hash)
+            if distance > self.threshold or (best_distance is not None and distance >= best_distance):
+                continue
+            if color_distance(color_signature, stored_signature) > self.color_threshold:
+                continue
+            best_distance = distance
+            best_colors = colors
+
+        if best_colors is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return best_colors.copy()
+
+    def store(self, image_hash, color_signature, num_colors, colors):
+        """
+        Store an extracted palette for later reuse.
+
+        :param image_hash: Perceptual hash of the source image.
+        :param color_signature: Color signature of the source image.
+        :param num_colors: Number of colors in the palette.
+        :param colors: Numpy array of RGB color values.
+        """
+        position = len(self.entries)
+        self.entries.append((image_hash, color_signature, np.array(colors)))
+        for key in self._band_keys(image_hash, num_colors):
+            self.index.setdefault(key, []).append(position)
+
+    def __len__(self):
+        return len(self.entries)
@@ -0,0 +1,178 @@
+import os
+import shutil
+import numpy as np
+
+# Per-record extraction parameters stored alongside each palette
+PARAMS_DTYPE = np.dtype([
+    ("num_colors", "u1"),
+    ("filtered", "?"),
+    ("complementary", "?"),
+    ("min_brightness", "f4"),
+    ("max_brightness", "f4"),
+])
+
+# Arrays written to every shard directory, one .npy file each
+SHARD_FIELDS = ("centers", "weights", "paths", "params")
+
+def _shard_dirs(directory):
+    """
+    List completed shard directories in order.
+
+    :param directory: Palette store directory.
+
+    :return: Sorted list of shard directory paths.
+    """
+    if not os.path.isdir(directory):
+        return []
+    names = sorted(
+        (name for name in os.listdir(directory)
+         if name.startswith("shard-") and name[len("shard-"):].isdigit()),
+        key=lambda name: int(name[len("shard-"):]),
+    )
+    return [os.path.join(directory, name) for name in names]
+
+class PaletteStoreWriter:
+    """
+    A chunked, appendable sink for batch palette results.
+
+    Palettes are buffered and written as shards of fixed-width numeric arrays:
+    an N x k x 3 uint8 array of centers, an N x k float32 array of weights,
+    the source paths and per-record extraction parameters. Each shard is a
+    directory of .npy files so PaletteStoreReader can memory-map them.
+    """
+
+    def __init__(self, directory, num_colors, shard_size=10000):
+        """
+        Initialize the writer, continuing after any shards already in the directory.
+
+        :param directory: Palette store directory (created if needed).
+        :param num_colors: Number of colors every stored palette must have.
+        :param shard_size: Number of records buffered before a shard is written.
+        """
+        self.directory = directory
+        self.num_colors = num_colors
+        self.shard_size = shard_size
+        os.makedirs(directory, exist_ok=True)
+        # Continue after the highest existing shard (earlier shards may have been pruned)
+        indices = [int(os.path.basename(shard_dir)[len("shard-"):]) for shard_dir in _shard_dirs(directory)]
+        self.next_shard = max(indices) + 1 if indices else 0
+        self._reset_buffer()
+
+    def _reset_buffer(self):
+        """
+        Clear the buffered records.
+        """
+        self.centers = []
+        self.weights = []
+        self.paths = []
+        self.params = []
+
+    def append(self, path, palette):
+        """
+        Add a palette to the store.
+
+        :param path: Source path of the image.
+        :param palette: ImagePalette object.
+        """
+        if len(palette.colors) != self.num_colors:
+            raise ValueError(f"Expected {self.num_colors} colors, got {len(palette.colors)}.")
+        min_brightness, max_brightness = palette.brightness_range
+        self.centers.append(np.clip(np.array(palette.colors), 0, 255).astype(np.uint8))
+        self.weights.append(palette.get_weights().astype(np.float32))
+        self.paths.append(str(path))
+        self.params.append((palette.num_colors, palette.is_filtered, palette.is_complementary,
+                            min_brightness, max_brightness))
+        if len(self.paths) >= self.shard_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Write any buffered records to a new shard.
+        """
+        if not self.paths:
+            return
+        arrays = {
+            "centers": np.stack(self.centers),
+            "weights": np.stack(self.weights),
+            "paths": np.array(self.paths),
+            "params": np.array(self.params, dtype=PARAMS_DTYPE),
+        }
+        shard_dir = os.path.join(self.directory, f"shard-{self.next_shard:06d}")
+        # Write into a temporary directory first so readers never see a partial shard
+        # (created with os.makedirs so the shard gets normal umask permissions and stays readable by other users)
+        temp_dir = os.path.join(self.directory, f".tmp-{self.next_shard:06d}-{os.getpid()}")
+        os.makedirs(temp_dir, exist_ok=True)
+        try:
+            for field in SHARD_FIELDS:
+                np.save(os.path.join(temp_dir, f"{field}.npy"), arrays[field])
+            os.replace(temp_dir, shard_dir)
+        except Exception:
+            # Don't leave a partial shard behind; buffered records are kept for a retry
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            raise
+        self.next_shard += 1
+        self._reset_buffer()
+
+    def close(self):
+        """
+        Flush remaining records.
+        """
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+class PaletteStoreReader:
+    """
+    A memory-mapped reader for palette stores written by PaletteStoreWriter.
+
+    Shards are opened with numpy memory-mapping, so downstream jobs can scan
+    results without loading the whole store into memory.
+    """
+
+    def __init__(self, directory):
+        """
+        Initialize the reader.
+
+        :param directory: Palette store directory.
+        """
+        self.directory = directory
+        self.shards = _shard_dirs(directory)
+
+    def _load(self, shard_dir, field):
+        """
+        Memory-map one array of a shard.
+
+        :param shard_dir: Shard directory path.
+        :param field: Name of the array to open.
+
+        :return: Read-only memory-mapped numpy array.
+        """
+        return np.load(os.path.join(shard_dir, f"{field}.npy"), mmap_mode="r")
+
+    def iter_shards(self, fields=SHARD_FIELDS):
+        """
+        Iterate over shards as memory-mapped arrays.
+
+        :param fields: Names of the arrays to open (any of "centers", "weights", "paths", "params").
+
+        :return: Generator of dictionaries mapping field names to arrays.
+        """
+        for shard_dir in self.shards:
+            yield {field: self._load(shard_dir, field) for field in fields}
+
+    def __iter__(self):
+        """
+        Iterate over individual records.
+
+        :return: Generator of (path, centers, weights, params) tuples.
+        """
+        for shard in self.iter_shards():
+            for i in range(len(shard["paths"])):
+                yield str(shard["paths"][i]), shard["centers"][i], shard["weights"][i], shard["params"][i]
+
+    def __len__(self):
+        return sum(len(shard["paths"]) for shard in self.iter_shards(fields=("paths",)))
@@ -0,0 +1,134 @@
+import numpy as np
+from multiprocessing import shared_memory
+from concurrent.futures import ProcessPoolExecutor
+from PIL import Image
+from image_palette import ImagePalette, THUMBNAIL_SIZE
+
+# Shared arrays attached in each pool worker (see _init_sweep_worker)
+_worker_blocks = []
+_worker_pixels = None
+_worker_brightness = None
+
+def decode_pixels(path):
+    """
+    Decode and downsample an image once, the same way ImagePalette does.
+
+    :param path: Path to the image file.
+
+    :return: Numpy uint8 array of shape (N, 3) with RGB pixel values.
+    """
+    with Image.open(path) as image:
+        image.thumbnail(THUMBNAIL_SIZE)
+        image = image.convert("RGB")
+        return np.asarray(image, dtype=np.uint8).reshape(-1, 3)
+
+class SharedPixels:
+    """
+    Pixel data published in shared memory for a parameter sweep.
+
+    Holds the RGB pixel array and its precomputed per-pixel brightness so pool
+    workers can attach to both without copying or re-decoding the image.
+    """
+
+    def __init__(self, pixels):
+        """
+        Copy pixel data into new shared memory blocks.
+
+        :param pixels: Numpy array of RGB pixel values with shape (N, 3).
+        """
+        pixels = np.asarray(pixels, dtype=np.uint8)
+        # HSV value channel, matching color_utils.rgb_to_brightness
+        brightness = pixels.max(axis=1) / 255.0
+        self.blocks = []
+        self.descriptors = []
+        for array in (pixels, brightness):
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[:] = array
+            self.blocks.append(block)
+            self.descriptors.append((block.name, array.shape, array.dtype.str))
+
+    def close(self):
+        """
+        Release and remove the shared memory blocks.
+        """
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+def _attach(descriptor):
+    """
+    Attach to a shared memory block and view it as a numpy array.
+
+    :param descriptor: (name, shape, dtype) tuple from SharedPixels.descriptors.
+
+    :return: Tuple of (SharedMemory block, numpy array backed by it).
+    """
+    name, shape, dtype = descriptor
+    block = shared_memory.SharedMemory(name=name)
+    return block, np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+def _init_sweep_worker(pixels_descriptor, brightness_descriptor):
+    """
+    Attach a pool worker to the shared pixel and brightness arrays.
+
+    :param pixels_descriptor: Descriptor of the shared pixel array.
+    :param brightness_descriptor: Descriptor of the shared brightness array.
+    """
+    global _worker_pixels, _worker_brightness
+    pixels_block, _worker_pixels = _attach(pixels_descriptor)
+    brightness_block, _worker_brightness = _attach(brightness_descriptor)
+    # Keep references so the blocks stay mapped for the life of the worker
+    _worker_blocks.extend([pixels_block, brightness_block])
+
+def _run_config(config):
+    """
+    Extract a palette from the shared pixels for one sweep configuration.
+
+    :param config: Dictionary with "num_colors" and optional "filter_dark", "filter_light",
+                   "min_brightness" and "max_brightness" keys.
+
+    :return: List of [r, g, b] integer lists sorted by hue.
+    """
+    from image_utils import filter_extreme_pixels
+    from color_utils import rgb_to_hue
+
+    pixels = _worker_pixels
+    filter_dark = config.get("filter_dark", False)
+    filter_light = config.get("filter_light", False)
+    if filter_dark or filter_light:
+        pixels = filter_extreme_pixels(
+            pixels,
+            filter_dark=filter_dark,
+            filter_light=filter_light,
+            min_brightness=config.get("min_brightness", 0.15),
+            max_brightness=config.get("max_brightness", 0.85),
+            brightness=_worker_brightness,
+        )
+    colors = ImagePalette._extract_colors(pixels, config["num_colors"])
+    return [[int(channel) for channel in color] for color in sorted(colors, key=rgb_to_hue)]
+
+def run_sweep(path, configs, max_workers=None):
+    """
+    Extract palettes for many parameter combinations of a single image in parallel.
+
+    The image is decoded and downsampled once and its pixels are published in
+    shared memory, so each worker only pays for filtering and clustering.
+
+    :param path: Path to the image file.
+    :param configs: List of configuration dictionaries (see _run_config).
+    :param max_workers: Number of worker processes (default is the CPU count).
+
+    :return: List of (config, colors) tuples in the same order as configs.
+    """
+    with SharedPixels(decode_pixels(path)) as shared:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_sweep_worker,
+                                 initargs=tuple(shared.descriptors)) as pool:
+            results = list(pool.map(_run_config, configs))
+    return list(zip(configs, results))
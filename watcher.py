@@ -0,0 +1,291 @@
+import os
+import json
+import time
+import hashlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from batch import extract_file_colors
+
+# File extensions treated as images when scanning the watched directory
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".bmp", ".tif", ".tiff", ".webp"}
+
+# Default manifest file name, stored inside the watched directory
+MANIFEST_NAME = ".palette_manifest.json"
+
+def hash_file(path, chunk_size=1 << 20):
+    """
+    Compute the SHA-256 content hash of a file.
+
+    :param path: Path to the file.
+    :param chunk_size: Number of bytes to read at a time.
+
+    :return: Hex digest string.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def scan_directory(directory):
+    """
+    Recursively list image files in a directory with their modification times and sizes.
+
+    :param directory: Directory to scan.
+
+    :return: Dictionary mapping relative paths to (mtime, size) tuples.
+    """
+    found = {}
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if os.path.splitext(name)[1].lower() not in IMAGE_EXTENSIONS:
+                continue
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                # File was removed between listing and stat
+                continue
+            found[os.path.relpath(path, directory)] = (stat.st_mtime, stat.st_size)
+    return found
+
+class FolderWatcher:
+    """
+    A long-running process that keeps a manifest of palettes in sync with an image directory.
+
+    The directory is polled and compared against a stored manifest of mtimes,
+    sizes and content hashes. Only added or modified images are sent to a warm
+    worker pool for extraction, and entries for deleted images are dropped.
+    If a worker process dies, the pool is rebuilt and the affected images are
+    retried on a later poll.
+    """
+
+    def __init__(self, directory, num_colors, manifest_path=None, interval=2.0, settle=1.0,
+                 max_workers=None, checkpoint_every=100, checkpoint_interval=10.0):
+        """
+        Initialize the FolderWatcher and load any existing manifest.
+
+        :param directory: Directory of images to watch.
+        :param num_colors: Number of dominant colors to extract per image.
+        :param manifest_path: Path of the JSON manifest (default is inside the watched directory).
+        :param interval: Seconds between directory polls.
+        :param settle: Seconds a file's mtime and size must stay unchanged before it is processed,
+                       so bursts of writes are only extracted once.
+        :param max_workers: Number of worker processes (default is the CPU count).
+        :param checkpoint_every: Save the manifest after this many new results within a poll.
+        :param checkpoint_interval: Save the manifest at least this often (seconds) while results arrive.
+        """
+        self.directory = directory
+        self.num_colors = num_colors
+        self.manifest_path = manifest_path or os.path.join(directory, MANIFEST_NAME)
+        self.interval = interval
+        self.settle = settle
+        self.max_workers = max_workers
+        self.checkpoint_every = checkpoint_every
+        self.checkpoint_interval = checkpoint_interval
+        # Worker pool, created on first use and rebuilt if a worker dies
+        self.pool = None
+        # Files seen changing but not yet stable: {relpath: ((mtime, size), last_change_time)}
+        self.pending = {}
+        self.files = self._load_manifest()
+
+    def _load_manifest(self):
+        """
+        Load file entries from the manifest, discarding them if they were
+        extracted with a different number of colors.
+
+        :return: Dictionary mapping relative paths to manifest entries.
+        """
+        if not os.path.exists(self.manifest_path):
+            return {}
+        try:
+            with open(self.manifest_path) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"\033[91mWarning: \033[0mCould not read manifest ({e}). Starting fresh.") # red
+            return {}
+        if manifest.get("num_colors") != self.num_colors:
+            return {}
+        return manifest.get("files", {})
+
+    def _save_manifest(self):
+        """
+        Atomically write the manifest to disk.
+        """
+        manifest = {"num_colors": self.num_colors, "files": self.files}
+        temp_path = self.manifest_path + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(temp_path, self.manifest_path)
+
+    def _collect_ready(self, found, now):
+        """
+        Update debounce state and return the files whose changes have settled.
+
+        :param found: Dictionary from scan_directory.
+        :param now: Current time in seconds.
+
+        :return: Dictionary mapping ready relative paths to (mtime, size) tuples.
+        """
+        # Forget pending files that have since been deleted
+        for relpath in list(self.pending):
+            if relpath not in found:
+                del self.pending[relpath]
+
+        ready = {}
+        for relpath, stat in found.items():
+            entry = self.files.get(relpath)
+            if entry is not None and (entry["mtime"], entry["size"]) == stat:
+                # Unchanged since last extraction
+                self.pending.pop(relpath, None)
+                continue
+            pending = self.pending.get(relpath)
+            if pending is None or pending[0] != stat:
+                # New write seen - (re)start the settle timer
+                self.pending[relpath] = (stat, now)
+            elif now - pending[1] >= self.settle:
+                ready[relpath] = stat
+                del self.pending[relpath]
+        return ready
+
+    def _get_pool(self):
+        """
+        Get the worker pool, creating it if needed.
+
+        :return: ProcessPoolExecutor.
+        """
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self.pool
+
+    def _reset_pool(self):
+        """
+        Discard a broken worker pool so the next poll starts a fresh one.
+        """
+        if self.pool is not None:
+            self.pool.shutdown(wait=False)
+            self.pool = None
+
+    def poll_once(self):
+        """
+        Scan the directory once and bring the manifest up to date.
+
+        The manifest is saved periodically as results arrive, and again when the
+        poll finishes or is interrupted, so completed extractions are not lost.
+
+        :return: Tuple of (number of files extracted, number of entries removed).
+        """
+        found = scan_directory(self.directory)
+        changed = False
+
+        # Drop entries for deleted files
+        removed = [relpath for relpath in self.files if relpath not in found]
+        for relpath in removed:
+            del self.files[relpath]
+            changed = True
+
+        ready = self._collect_ready(found, time.time())
+
+        futures = {}
+        broken = False
+        for relpath, (mtime, size) in ready.items():
+            path = os.path.join(self.directory, relpath)
+            try:
+                content_hash = hash_file(path)
+            except OSError:
+                # File vanished or is unreadable - pick it up on a later poll
+                continue
+            entry = self.files.get(relpath)
+            if entry is not None and entry["sha256"] == content_hash:
+                # Touched but content unchanged - keep the existing palette
+                entry["mtime"], entry["size"] = mtime, size
+                changed = True
+                continue
+            try:
+                future = self._get_pool().submit(extract_file_colors, path, self.num_colors)
+            except BrokenProcessPool:
+                # A worker died earlier in this poll - remaining files are retried on a later poll
+                broken = True
+                break
+            futures[future] = (relpath, mtime, size, content_hash)
+
+        extracted = 0
+        unsaved = 0
+        last_save = time.time()
+        try:
+            for future in as_completed(futures):
+                relpath, mtime, size, content_hash = futures[future]
+                try:
+                    colors = future.result()
+                except BrokenProcessPool:
+                    # The worker died, not necessarily on this file - leave it out of the manifest to retry
+                    broken = True
+                    print(f"\033[91mWorker process died while processing {relpath}. It will be retried.\033[0m")
+                    continue
+                except Exception as e:
+                    # Record the failure so the file is not retried until it changes again
+                    print(f"\033[91mError processing {relpath}: {e}\033[0m")
+                    colors = None
+                self.files[relpath] = {"mtime": mtime, "size": size, "sha256": content_hash, "colors": colors}
+                extracted += 1
+                unsaved += 1
+                changed = True
+
+                # Checkpoint so a crash mid-backfill doesn't lose completed work
+                if unsaved >= self.checkpoint_every or time.time() - last_save >= self.checkpoint_interval:
+                    self._save_manifest()
+                    unsaved = 0
+                    last_save = time.time()
+                    changed = False
+        finally:
+            if changed:
+                self._save_manifest()
+            if broken:
+                self._reset_pool()
+        return extracted, len(removed)
+
+    def run(self):
+        """
+        Poll the directory until interrupted, reusing one worker pool throughout.
+
+        Near-duplicate palette reuse is not used here: a long-lived cache would
+        never evict entries for modified or deleted files, so a modified image
+        could be given the palette of its previous version.
+        """
+        print(f"Watching {self.directory} (manifest: {self.manifest_path})")
+        try:
+            while True:
+                extracted, removed = self.poll_once()
+                if extracted or removed:
+                    print(f"Extracted {extracted} palettes, removed {removed} entries.")
+                time.sleep(self.interval)
+        except KeyboardInterrupt:
+            print("\nExiting the program. Goodbye!")
+        finally:
+            if self.pool is not None:
+                self.pool.shutdown()
+                self.pool = None
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Keep a palette manifest in sync with an image directory.")
+    parser.add_argument("directory", help="Directory of images to watch")
+    parser.add_argument("-n", "--num-colors", type=int, default=5, help="Number of colors to extract (1-20)")
+    parser.add_argument("--manifest", help="Path of the JSON manifest (default: inside the directory)")
+    parser.add_argument("--interval", type=float, default=2.0, help="Seconds between directory polls")
+    parser.add_argument("--settle", type=float, default=1.0, help="Seconds a file must be unchanged before processing")
+    parser.add_argument("--workers", type=int, help="Number of worker processes")
+    args = parser.parse_args()
+
+    if args.num_colors < 1 or args.num_colors > 20:
+        parser.error("number of colors must be between 1 and 20")
+
+    FolderWatcher(
+        args.directory,
+        args.num_colors,
+        manifest_path=args.manifest,
+        interval=args.interval,
+        settle=args.settle,
+        max_workers=args.workers,
+    ).run()